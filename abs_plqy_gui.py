@@ -55,10 +55,13 @@ from matplotlib.backends.backend_tkagg import (
 from mpl_toolkits.axes_grid1.inset_locator import inset_axes
 import numpy as np
 import os
+import io
 from textwrap import wrap
 from datetime import datetime
+from pathlib import Path
 import threading
 import queue
+import traceback
 import time
 
 
@@ -121,94 +124,160 @@ def collect_intensities():
     collects power data from the external Si detector by calling the function
     "measure_34410a_current_average", which runs on a new thread. Returns the 
     spectrum and power intensities as a dataframe.
+    
+    The subruns are added up as they are collected (running sum), so memory
+    use does not depend on the number of subruns.
     """
 
     number_of_subruns = int(initialize_frame.entry_subruns.get()) # number of subruns to average over
-    data_array = []
-    power_mean_array = []
+    number_of_pixels = len(initialize_frame.wavelength_np)
+    data_sum = np.zeros(number_of_pixels)
+    power_sum = 0.0
     for n in range(0, number_of_subruns):
-        initialize_frame.label_collection_progress.config(text="Collecting " + str(n+1) + " of " 
-                                                  + str(number_of_subruns) + "...")
+        initialize_frame.set_progress("Collecting " + str(n+1) + " of " 
+                                      + str(number_of_subruns) + "...")
         e = threading.Event() # make event to synchronize power detection with spectrometer
+        done = threading.Event() # set when power measurement is finished
+        initialize_frame.current_uA_mean = None # so that a missing measurement is noticed
         threading.Thread(name="power measure thread", target=measure_34410a_current_average,
-                         args=(e,)).start() #start power measurement on new thread
-        initialize_frame.spec.features["data_buffer"][0].clear() 
-        data = initialize_frame.spec.intensities(correct_dark_counts=True) #collect data from spectrometer
-        e.set() # trigger event to stop power measurement
-        time.sleep(0.2) #wait for power measurement to finish
-        power = initialize_frame.current_uA_mean #power data from "measure_34410a_current_average(e)" function
-        data_array.append(data)
-        power_mean_array.append(power)
-        
-    initialize_frame.label_collection_progress.config(text="Collection done. ")
-    data_average = np.mean(data_array, axis=0)
-    power_average = np.mean(power_mean_array, axis=0)
+                         args=(e, done)).start() #start power measurement on new thread
+        try:
+            initialize_frame.spec.features["data_buffer"][0].clear() 
+            data = initialize_frame.spec.intensities(correct_dark_counts=True) #collect data from spectrometer
+        finally:
+            e.set() # trigger event to stop power measurement (also if the spectrometer fails)
+        np.add(data_sum, data, out=data_sum)
+        #wait for power measurement to finish (the last multimeter reading may
+        #still be in progress). Never normalize by a missing or old power
+        if not done.wait(timeout=10.0) or initialize_frame.current_uA_mean is None:
+            raise RuntimeError("No power measurement from the multimeter for subrun "
+                               + str(n+1))
+        power_sum += initialize_frame.current_uA_mean #power data from "measure_34410a_current_average(e, done)" function
+        
+    initialize_frame.set_progress("Collection done. ")
+    data_average = data_sum/number_of_subruns
+    power_average = power_sum/number_of_subruns
     initialize_frame.queue.put(data_average) #save data in queue so that main thread can read and plot
 
     return data_average, power_average
 
 
-def measure_34410a_current_average(e):
-    """Measure the DC current from the multimeter in sync with spectrometer
+def calibrate(intensities, dark, calib_factor, out):
+    """Convert raw intensities (n_meas, n_pixels) into photon counts/nm
     
-    The DC current from the multimeter is proportional to the intensity of light
-    from the Si detector. As long as the event, e, is not set, it collects data.
-    Once e is set, which indicates that the spectrometer is done, it breaks out
-    of the loop and averages all the values
+    Subtracts the dark spectrum and multiplies by the calibration factor (see
+    "collect_multi") for all measurements at once, writing into out (which
+    can be intensities itself) without temporary arrays.
+    """
+    np.subtract(intensities, dark, out=out)
+    np.multiply(out, calib_factor, out=out)
+    return out
+
 
+def trapezoid_weights(wavelength):
+    """Trapezoid rule weights for integrating a spectrum over wavelength
+    
+    B_i = (x_(i+1) - x_(i-1))/2, and half the spacing at both ends. y @ B is the
+    trapezoid integral over the whole spectrum. For a range of points, 
+    y[i0:i1] @ B[i0:i1] gives every point the full width of its own interval
+    (the end points of the range are not halved), i.e. the sum of y times the
+    wavelength spacing. Only the first and last pixel of the spectrum get half
+    a width.
+    
+    In the interior, B is the same as the wavelength spacing (delta_x) that the
+    spectrum is divided by in "collect_multi". The two cancel, i.e. the integral
+    of the photon counts/nm is the sum of the photon counts. The division is 
+    still done so that the saved spectra are in photon counts/nm.
     """
-    power_array = []
-    while not e.isSet():
-        current_uA = initialize_frame.multimeter.current_dc*1e6
-        initialize_frame.label_multimeter_current_value.config(text=round(current_uA,4))
-        power_array.append(current_uA)
-    initialize_frame.current_uA_mean =  np.mean(power_array)
+    weights = np.empty(len(wavelength))
+    weights[0] = wavelength[1] - wavelength[0]
+    weights[-1] = wavelength[-1] - wavelength[-2]
+    weights[1:-1] = wavelength[2:] - wavelength[:-2]
+    weights *= 0.5
+    return weights
+
+
+def uniform_spacing(wavelength):
+    """Spacing of the wavelengths if they are evenly spaced, otherwise None"""
+    spacing = np.diff(wavelength)
+    if np.allclose(spacing, spacing[0]):
+        return float(spacing[0])
+    return None
+
+
+def integrate_region(counts, weights, i_low, i_high, power, dx=None):
+    """Integrate the counts of each measurement over a wavelength region
     
+    counts: (wavelength, measurement) array of counts/nm (float64)
+    weights: trapezoid weights of the wavelengths (see "trapezoid_weights")
+    i_low, i_high: indices of the region, i.e. the rows counts[i_low:i_high]
+    power: power of each measurement, which the integrals are normalized by
+    dx: wavelength spacing if it is uniform (see "uniform_spacing"), else None
+    
+    The weighted sum is a single matrix-vector product (BLAS). For a uniform spacing, all weights except the
+    (halved) end points are dx, so a region without the end points is just 
+    the sum times dx.
+    
+    Returns: array of the normalized integral of each measurement
+    """
+    if dx is not None and i_low > 0 and i_high < len(weights):
+        integral = counts[i_low:i_high].sum(axis=0)
+        integral *= dx
+    else:
+        integral = counts[i_low:i_high].T @ weights[i_low:i_high]
+    integral /= power
+    return integral
+
 
-def collect_data_loop_thread():
-    """Starts a separate data collection thread so that GUI does not freeze
-    Calls "collect_data_loop"
+def read_data_file(path):
+    """Read a blank/sample data file in a single pass
+    
+    The file has the power dataframe (column names and one row of values) on
+    the first two lines, an empty line, then the spectrum dataframe (see 
+    "save_and_attach"). The file is opened once: the power lines are read
+    first, then pandas reads the spectrum from the rest of the same file.
+    
+    Returns: df (spectrum), df_power
     """
-    threading.Thread(name="collection thread", target=collect_data_loop).start()
+    with open(path) as f:
+        power_lines = f.readline() + f.readline()
+        f.readline() #empty line
+        df = pd.read_csv(f)
+    df_power = pd.read_csv(io.StringIO(power_lines))
+    return df, df_power
 
 
-def collect_data_loop(): 
-    """Main loop for data collection options
+def measure_34410a_current_average(e, done):
+    """Measure the DC current from the multimeter in sync with spectrometer
     
-    Waits for the user to presss a button for dark spectrum, blank spectrum,
-    sample spectrum  or live view. Pressing these buttons turns the relevant
-    boolean to True which calls the relevant function. If dark, blank, or
-    sample is collected, turn all bool to False to prevent accidental 
-    back-to-back measurements when multiple buttons have been prressed.
+    The DC current from the multimeter is proportional to the intensity of light
+    from the Si detector. As long as the event, e, is not set, it collects data.
+    Once e is set, which indicates that the spectrometer is done, it breaks out
+    of the loop and averages all the values. The event, done, is set once
+    the average is saved.
     
-    After 10 ms, calls "collect_data_loop_thread" to start a new thread that
-    calls back "collect_data_loop"
+    The displayed current is only updated every 0.1 s, and the update is
+    passed to the main (GUI) thread (see "set_var").
     """
+    set_var = initialize_frame.set_var
+    current_var = initialize_frame.current_var
+    power_array = []
+    last_update = 0.0
+    is_set = e.is_set
+    try:
+        while not is_set():
+            current_uA = initialize_frame.multimeter.current_dc*1e6
+            power_array.append(current_uA)
+            now = time.monotonic()
+            if now - last_update > 0.1:
+                set_var(current_var, f"{current_uA:.4f}")
+                last_update = now
+        if not power_array:
+            raise RuntimeError("No multimeter reading during the spectrum collection")
+        initialize_frame.current_uA_mean = float(np.mean(power_array))
+    finally:
+        done.set()
     
-    if (initialize_frame.collect_dark_bool == True or
-        collect_data_frame.collect_blank_bool == True or
-        collect_data_frame.collect_sample_bool == True):
-        
-        if initialize_frame.collect_dark_bool == True:
-            initialize_frame.dark_spec()
-            initialize_frame.label_collection_progress.config(text="Dark collection done!")
-        elif collect_data_frame.collect_blank_bool == True:
-            collect_data_frame.collect_blank()
-            initialize_frame.label_collection_progress.config(text="Blank collection done!")
-        elif collect_data_frame.collect_sample_bool == True:
-            collect_data_frame.collect_sample()
-            initialize_frame.label_collection_progress.config(text="Sample collection done!")
-        time.sleep(0.2)
-        # change all to False to prevent back-to-back measurement
-        initialize_frame.collect_dark_bool = False
-        collect_data_frame.collect_blank_bool = False
-        collect_data_frame.collect_sample_bool = False 
-        
-    elif initialize_frame.live_view_bool == True:
-        collect_intensities()
-    
-    initialize_frame.after(10, collect_data_loop_thread) #repeat loop after 10 ms
-       
 
 class InitializeFrame(ttk.LabelFrame):
     """Initialization frame (top left)
@@ -225,6 +294,8 @@ class InitializeFrame(ttk.LabelFrame):
         self.columnconfigure(1, weight=5)
         self.columnconfigure(2, weight=5)
         
+        self.acq_q = None # commands for the acquisition thread, made by "init_spec"
+        
         self.__widgets() 
         self.__plot_figure()
         
@@ -242,6 +313,8 @@ class InitializeFrame(ttk.LabelFrame):
         
         # live view button
         self.live_view_bool = False
+        self.live_view_queued = False #a "live view" command is queued or running
+        self.live_view_lock = threading.Lock() #for switching and re-queuing live view
         self.button_live_view = ttk.Button(self, text="Live view on/off",
                                           command=self.live_view_bool_switch)
         self.button_live_view.grid(column=2, row=4, rowspan=1, sticky=tk.NS)
@@ -253,7 +326,8 @@ class InitializeFrame(ttk.LabelFrame):
         self.button_max_intensity.grid(column=2, row=5, sticky=tk.NS)
         
         #collection progress
-        self.label_collection_progress = ttk.Label(self, text="",
+        self.progress_var = tk.StringVar()
+        self.label_collection_progress = ttk.Label(self, textvariable=self.progress_var,
                                                    foreground="teal")
         self.label_collection_progress.grid(column=0, row=2)
        
@@ -262,6 +336,7 @@ class InitializeFrame(ttk.LabelFrame):
                                 anchor="center")
         self.label_int_time.grid(column=0, row=4,sticky=tk.W) 
         
+        self.int_time_after_id = None
         self.int_time_str = tk.IntVar(value=integration_time)
         self.int_time_str.trace_add("write", self.set_int_time)
         self.entry_int_time = ttk.Entry(self, width=8, textvariable=self.int_time_str)
@@ -278,12 +353,12 @@ class InitializeFrame(ttk.LabelFrame):
         self.entry_subruns.grid(column=1, row=5, sticky=tk.W)
         
         # #Collect dark spectrum
-        self.collect_dark_bool = False
         self.button_dark = ttk.Button(self, text="Collect dark spectrum",
-                                      command=self.collect_dark_bool_true)
+                                      command=self.request_dark)
         self.button_dark.grid(column=0, row=6, rowspan=1, sticky=tk.EW)
         
-        self.label_dark = ttk.Label(self, text="Please collect dark spectrum")
+        self.dark_var = tk.StringVar(value="Please collect dark spectrum")
+        self.label_dark = ttk.Label(self, textvariable=self.dark_var)
         self.label_dark.grid(column=1, row=6, columnspan=2, sticky=tk.EW)
         
         # Wavelength calibration file
@@ -291,7 +366,8 @@ class InitializeFrame(ttk.LabelFrame):
                                              command=self.calibration_file)
         self.button_calibration.grid(column=0, row=7, sticky=tk.EW)
         
-        self.label_calibration = ttk.Label(self, text="Load calibration file")
+        self.calibration_var = tk.StringVar(value="Load calibration file")
+        self.label_calibration = ttk.Label(self, textvariable=self.calibration_var)
         self.label_calibration.grid(column=1, row=7, columnspan=2, sticky=tk.W)
         
         # Power-meter current
@@ -304,8 +380,14 @@ class InitializeFrame(ttk.LabelFrame):
         self.fig = Figure(figsize=(6,4), dpi=60, tight_layout=True)
         self.ax = self.fig.add_subplot(111)
         
+        # spectrum line is animated so that it is left out of full redraws and
+        # is blitted on top of the cached background instead
+        self.line, = self.ax.plot([], [], animated=True)
+        self.hline = self.ax.axhline(max_counts, color="grey", linestyle="dashed")
+        
         #display canvas
         self.canvas = FigureCanvasTkAgg(self.fig, master=self)
+        self.canvas.mpl_connect("draw_event", self.on_draw)
         self.canvas.draw()
         self.canvas.get_tk_widget().grid(column=0, row=1, columnspan=4) 
         
@@ -326,7 +408,8 @@ class InitializeFrame(ttk.LabelFrame):
         self.multimeter.clear()
         self.current_uA = round(self.multimeter.current_dc*1e6, 4)
         
-        self.label_multimeter_current_value = ttk.Label(self, text=self.current_uA) #display current
+        self.current_var = tk.StringVar(value=self.current_uA)
+        self.label_multimeter_current_value = ttk.Label(self, textvariable=self.current_var) #display current
         self.label_multimeter_current_value.grid(column=1, row=3, sticky=tk.W, pady=(3,15))
 
     
@@ -334,66 +417,199 @@ class InitializeFrame(ttk.LabelFrame):
         #initialize the spectrometer
         self.spec = Spectrometer.from_serial_number(spec_serial_number) 
         self.label_init_spec.config(text=self.spec) #show spectrometer name
-        self.set_int_time() #set default integration time
+        self.apply_int_time() #set default integration time
 
-        self.df = pd.DataFrame({"wavelength": self.spec.wavelengths()}) #save wavelength points
-        self.df["delta_x"] = np.gradient(self.df["wavelength"]) #save wavelength spacing
-        
+        # wavelength points and spacing (kept as arrays, dataframes are only
+        # made for saving in "collect_multi")
+        self.wavelength_np = self.spec.wavelengths().astype(np.float64)
+        self.deltax_np = np.gradient(self.wavelength_np)
+        # wavelengths never change, so only the y data of the spectrum is updated
+        self.line.set_data(self.wavelength_np, np.full_like(self.wavelength_np, np.nan))
+        
+        # Threads: the acquisition thread runs all data collection commands
+        # (spectrometer, and multimeter through short-lived power measure 
+        # threads) in order, so that measurements never overlap. Collected
+        # spectra are passed back through self.queue to the main (GUI) thread,
+        # which plots them in "update_graph" and never waits for the instruments.
         self.queue = queue.Queue() # queue used to transfer data between threads
-        collect_data_loop_thread() #begin loop for data collection on new thread
+        self.acq_q = queue.Queue() # commands for the acquisition thread
+        # dispatch table of the commands: name -> (function, message when done)
+        self.commands = {
+            "dark": (self.dark_spec, "Dark collection done!"),
+            "blank": (collect_data_frame.collect_blank, "Blank collection done!"),
+            "sample": (collect_data_frame.collect_sample, "Sample collection done!"),
+            "live view": (self.live_view, None),
+            }
+        self.acq_thread = threading.Thread(name="acquisition thread", 
+                                           target=self.run_commands, daemon=True)
+        self.acq_thread.start()
         self.update_graph() #begin loop for updating graph
     
+    def run_commands(self):
+        # acquisition thread: wait for a command name from the queue and run it.
+        # Commands are run one at a time in the order the buttons were pressed.
+        while True:
+            name = self.acq_q.get()
+            function, done_message = self.commands[name]
+            try:
+                function()
+                if done_message is not None:
+                    self.set_progress(done_message)
+            except Exception as error:
+                #show the failure (the GUI is usually run without a console) and
+                #keep the thread alive for the next command
+                traceback.print_exc()
+                self.set_progress("\n".join(wrap(name.capitalize() + " failed: "
+                                                  + str(error), 40)))
+    
     
     def set_int_time(self, *args):
-        #set/change integration time
-        self.spec.integration_time_micros(self.int_time_str.get()*1e3)        
+        #set/change integration time 300 ms after the user stops typing, so that
+        #the spectrometer is not sent every partial value (e.g. 1, 15, 150, 1500)
+        if self.int_time_after_id is not None:
+            self.after_cancel(self.int_time_after_id)
+        self.int_time_after_id = self.after(300, self.apply_int_time)
+        
+    def apply_int_time(self):
+        #send integration time to the spectrometer if it is a valid value
+        self.int_time_after_id = None
+        try:
+            int_time = self.int_time_str.get()
+        except tk.TclError: #empty or not a number
+            return
+        if int_time > 0:
+            self.spec.integration_time_micros(int_time*1e3)
         
         
     def update_graph(self):
         # update graph for live view or dark/blank/sample measurement
         # if queue is not empty (data has been collected), then get and plot values
+        # (only the newest if the GUI has fallen behind)
         #refreshes every 10 ms
         
         if not self.queue.empty():
             data = self.queue.get()
-            self.ax.clear()    
-            self.ax.plot(self.df["wavelength"], data)
-            if self.max_intensity_bool == True:
-                self.ax.axhline(max_counts, color="grey", linestyle="dashed")
-            self.canvas.draw() 
+            while not self.queue.empty():
+                data = self.queue.get()
+            self.line.set_ydata(data)
+            if self.rescale_needed():
+                self.canvas.draw_idle() #axes changed, redraw everything
+            else:
+                #only redraw the spectrum on top of the cached background
+                self.canvas.restore_region(self.bg)
+                self.ax.draw_artist(self.line)
+                self.canvas.blit(self.ax.bbox)
         self.after(10, self.update_graph)   
         
+    def rescale_needed(self):
+        """Autoscale to the new spectrum and check if the axes have changed
+        
+        Small changes in the y limits (< 5% of the range, e.g. from noise) are
+        ignored and the previous limits are kept so that the cached background
+        stays valid. Returns True if a full redraw is needed.
+        """
+        old_xlim = self.ax.get_xlim()
+        old_ylim = self.ax.get_ylim()
+        self.ax.relim(visible_only=True)
+        self.ax.autoscale_view()
+        new_xlim = self.ax.get_xlim()
+        new_ylim = self.ax.get_ylim()
+        
+        tolerance = 0.05*(old_ylim[1] - old_ylim[0])
+        if (new_xlim != old_xlim or abs(new_ylim[0] - old_ylim[0]) > tolerance
+            or abs(new_ylim[1] - old_ylim[1]) > tolerance):
+            return True
+        self.ax.set_xlim(old_xlim, auto=None)
+        self.ax.set_ylim(old_ylim, auto=None)
+        return False
+    
+    def on_draw(self, event):
+        # after every full redraw (e.g. resize, zoom), save the new background
+        # and draw the spectrum back on top of it. Not for the draw of "savefig"
+        # (other dpi, and the screen is not redrawn afterwards)
+        if self.canvas.is_saving():
+            return
+        self.bg = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.line)
         
     def live_view_bool_switch(self):
-        if self.live_view_bool == False:
-            self.live_view_bool = True
-        else:
-            self.live_view_bool = False
+        with self.live_view_lock:
+            if self.live_view_bool == False:
+                self.live_view_bool = True
+                #otherwise the queued live view continues (or, before the
+                #instruments are initialized, there is nothing to queue yet)
+                if not self.live_view_queued and self.acq_q is not None:
+                    self.acq_q.put("live view")
+                    self.live_view_queued = True
+            else:
+                self.live_view_bool = False
+            
+    def live_view(self):
+        # collect one spectrum, then queue itself again while live view is on.
+        # Dark/blank/sample collections queued in the meantime are run
+        # in between live view spectra. Only one live view is queued at a time,
+        # however often live view is switched off and on again
+        try:
+            if self.live_view_bool == True:
+                collect_intensities()
+        except Exception:
+            self.live_view_bool = False #stop live view if the collection fails
+            raise
+        finally:
+            with self.live_view_lock:
+                if self.live_view_bool == True:
+                    self.acq_q.put("live view")
+                else:
+                    self.live_view_queued = False
             
     def max_intensity_bool_switch(self):
         if self.max_intensity_bool == False:
             self.max_intensity_bool = True
         else:
             self.max_intensity_bool = False
+        self.hline.set_visible(self.max_intensity_bool)
+        self.ax.relim(visible_only=True)
+        self.ax.autoscale_view()
+        self.canvas.draw_idle()
                 
-    def collect_dark_bool_true(self):
-        self.collect_dark_bool = True
+    def set_var(self, var, text):
+        # update the text of a label (through its StringVar). Can be called 
+        # from the collection threads: the update is done by the main thread
+        # when idle, so rapid updates only cause one redraw of the label
+        self.after_idle(var.set, text)
+        
+    def set_progress(self, text):
+        #show collection progress
+        self.set_var(self.progress_var, text)
+        
+    def request(self, name):
+        #queue a command for the acquisition thread, once the instruments are initialized
+        if self.acq_q is None:
+            self.set_progress("Please initialize instruments first")
+            return
+        self.acq_q.put(name)
+        
+    def request_dark(self):
+        self.request("dark")
         
         
     def dark_spec(self):
         # collect dark spectra and display collection time
-        self.df["dark"], _ = collect_intensities()
+        self.dark_np, _ = collect_intensities()
         now = datetime.now()
         current_time = now.strftime("%H:%M:%S")
-        self.label_dark.config(text="Calibrated at " + current_time)
+        self.set_var(self.dark_var, "Calibrated at " + current_time)
         
         
     def calibration_file(self):
         #load calibration file and display
         self.calib_file_dir= fd.askopenfilename(title="Select callibration file", filetypes = (("Text files", "*.IRRADCAL"),("All files","*.*")))
-        self.df["irradcal"] = pd.read_csv(self.calib_file_dir, sep=("\t"), 
-                  skiprows=8, usecols=[1])
-        self.label_calibration.config(text=os.path.basename(self.calib_file_dir))
+        # 8 lines of file info and 1 line of column names before the data
+        self.irradcal_np = np.loadtxt(self.calib_file_dir, delimiter="\t", 
+                                      skiprows=9, usecols=1)
+        # calibration factor used in "collect_multi" (see there)
+        self.calib_factor = self.irradcal_np/self.deltax_np*self.wavelength_np/1000
+        self.calibration_var.set(os.path.basename(self.calib_file_dir))
                
         
         
@@ -440,9 +656,8 @@ class CollectDataFrame(ttk.LabelFrame):
         self.entry_blank.insert(0, blank_name)
         self.entry_blank.grid(column=1, row=2, pady=(15,0), sticky=tk.W)
         
-        self.collect_blank_bool = False
         self.button_blank = ttk.Button(self, text="Collect blank(s)",
-                                       command=self.collect_blank_bool_true)
+                                       command=self.request_blank)
         self.button_blank.grid(column=0, row=3, columnspan=2, sticky=tk.NSEW)
         
         #Sample name and collect sample button
@@ -453,9 +668,8 @@ class CollectDataFrame(ttk.LabelFrame):
         self.entry_sample.insert(0, sample_name)
         self.entry_sample.grid(column=1, row=4, pady=(15,0), sticky=tk.W)
         
-        self.collect_sample_bool = False
         self.button_sample = ttk.Button(self, text="Collect sample(s)",
-                                        command=self.collect_sample_bool_true)
+                                        command=self.request_sample)
         self.button_sample.grid(column=0, row=5, columnspan=2, sticky=tk.NSEW)
     
     def saving_folder(self):
@@ -474,33 +688,36 @@ class CollectDataFrame(ttk.LabelFrame):
         intensity as dataframes.
         """
         number_of_meas = int(collect_data_frame.entry_number_meas.get())
+        dark = initialize_frame.dark_np
+        calib_factor = initialize_frame.calib_factor
 
-        inten_dict = {}
-        power_dict = {}
+        photon_counts = np.empty((number_of_meas, len(calib_factor)))
+        power = np.empty(number_of_meas)
     
         for n in range(number_of_meas):
-            intensities, power_meas = collect_intensities()
-            inten_dict["meas_" + str(n)] = (intensities - initialize_frame.df["dark"])*\
-                initialize_frame.df["irradcal"]/initialize_frame.df["delta_x"]*\
-                initialize_frame.df["wavelength"]/1000     
-            power_dict["meas" + str(n) + "_power"] = [power_meas]    
+            photon_counts[n], power[n] = collect_intensities() #raw intensities
+        calibrate(photon_counts, dark, calib_factor, out=photon_counts)
             
-    
-        df_multi = pd.concat(inten_dict, axis=1) #make into dataframe
-        df_multi["mean_photon_counts"] = df_multi.mean(axis=1)
-        df_multi.insert(0, "wavelength", initialize_frame.df["wavelength"])
-        
-        df_power = pd.DataFrame(power_dict)
-        df_power["laser_power_mean_uA"] = df_power.mean(axis=1)
+        #make into dataframes, each in a single call
+        df_multi = pd.DataFrame(
+            np.column_stack((initialize_frame.wavelength_np, photon_counts.T,
+                             photon_counts.mean(axis=0))),
+            columns=(["wavelength"] + [f"meas_{n}" for n in range(number_of_meas)]
+                     + ["mean_photon_counts"]))
+        
+        df_power = pd.DataFrame(
+            np.append(power, power.mean()).reshape(1, -1),
+            columns=([f"meas{n}_power" for n in range(number_of_meas)]
+                     + ["laser_power_mean_uA"]))
 
         return df_multi, df_power
     
     
-    def collect_blank_bool_true(self):
-        self.collect_blank_bool = True
+    def request_blank(self):
+        initialize_frame.request("blank")
         
-    def collect_sample_bool_true(self):
-        self.collect_sample_bool = True
+    def request_sample(self):
+        initialize_frame.request("sample")
        
     def collect_blank(self):
         """Collect and save blank data
@@ -508,24 +725,8 @@ class CollectDataFrame(ttk.LabelFrame):
         """
         self.df_blank, self.df_blank_power = self.collect_multi()
         current_datetime = datetime.now().strftime("%Y%m%d-%H%M%S")
-  
-        blank_path_name = f"{self.folder_path}/{current_datetime}_{self.entry_blank.get()}.csv"
-        
-        self.df_blank_power.to_csv(blank_path_name, mode="a", index=False) #write power df
-        
-        with open(blank_path_name, 'a', newline="") as f:
-            f.write("\n")
-        
-        self.df_blank.to_csv(blank_path_name, mode="a", index=False)
-        
-        #load analysis path with this data
-        analyze_data_frame.blank_file_dir = blank_path_name
-        analyze_data_frame.df_blank = pd.read_csv(analyze_data_frame.blank_file_dir, skiprows=3)
-        analyze_data_frame.df_blank_power = pd.read_csv(analyze_data_frame.blank_file_dir
-                                                        , skiprows=lambda x:x not in [0,1])
-
-        analyze_data_frame.blank_name = os.path.basename(analyze_data_frame.blank_file_dir)
-        analyze_data_frame.label_blank.config(text=analyze_data_frame.blank_name)
+        blank_path = Path(self.folder_path) / f"{current_datetime}_{self.entry_blank.get()}.csv"
+        self.save_and_attach(self.df_blank_power, self.df_blank, blank_path, "blank")
         
     def collect_sample(self):
         """Collect and save sample data
@@ -533,24 +734,40 @@ class CollectDataFrame(ttk.LabelFrame):
         """
         self.df_sample, self.df_sample_power = self.collect_multi()
         current_datetime = datetime.now().strftime("%Y%m%d-%H%M%S")
-        # sample_path_name = self.folder_path + r"/" + current_datetime + r"_" +\
-        #     self.entry_sample.get() + r".csv"
-        sample_path_name = f"{self.folder_path}/{current_datetime}_{self.entry_sample.get()}.csv"
-       
-        self.df_sample_power.to_csv(sample_path_name, mode="a", index=False) #write power df
+        sample_path = Path(self.folder_path) / f"{current_datetime}_{self.entry_sample.get()}.csv"
+        self.save_and_attach(self.df_sample_power, self.df_sample, sample_path, "sample")
         
-        with open(sample_path_name, 'a', newline="") as f:
-            f.write("\n")
+    def save_and_attach(self, df_power, df_spec, path, prefix):
+        """Save the power and spectrum dataframes into a single csv file and
+        load them into the analysis frame
         
-        self.df_sample.to_csv(sample_path_name, mode="a", index=False)
+        The file has the power dataframe on top, an empty line, then the 
+        spectrum dataframe (same format as read by "import_blank"/"import_sample").
+        The analysis frame gets copies of the collected dataframes directly
+        instead of reading the file back (see "attach").
         
-        #load analysis path with sample data
-        analyze_data_frame.sample_file_dir = sample_path_name 
-        analyze_data_frame.df_sample = pd.read_csv(analyze_data_frame.sample_file_dir, skiprows=3)
-        analyze_data_frame.df_sample_power = pd.read_csv(analyze_data_frame.sample_file_dir
-                                                        , skiprows=lambda x:x not in [0,1])
-        analyze_data_frame.sample_name = os.path.basename(analyze_data_frame.sample_file_dir)
-        analyze_data_frame.label_sample.config(text=analyze_data_frame.sample_name)
+        path: pathlib.Path of the csv file
+        prefix: "blank" or "sample"
+        """
+        with open(path, 'w', newline="") as f:
+            df_power.to_csv(f, index=False) #write power df
+            f.write("\n")
+            df_spec.to_csv(f, index=False)
+        
+        #runs on the acquisition thread, so the analysis frame (data, cache
+        #and labels) is updated by the main thread when idle
+        self.after_idle(self.attach, df_power.copy(), df_spec.copy(), path, prefix)
+        
+    def attach(self, df_power, df_spec, path, prefix):
+        #load analysis path with this data (main thread, see "save_and_attach")
+        adf = analyze_data_frame
+        name = path.name
+        setattr(adf, f"{prefix}_file_dir", str(path))
+        setattr(adf, f"df_{prefix}", df_spec)
+        setattr(adf, f"df_{prefix}_power", df_power)
+        adf.prepare_arrays(prefix)
+        setattr(adf, f"{prefix}_name", name)
+        getattr(adf, f"label_{prefix}").config(text=name)
             
         
         
@@ -572,6 +789,13 @@ class AnalyzeDataFrame(ttk.LabelFrame):
         self.__widgets()
         self.__plot_figure()
         
+        self.bound_index_key = None #bounds and blank wavelengths of saved indices
+        self.plot_built = False #analysis plot lines have been made (see "build_plot")
+        self.plotted_data = (None, None) #blank and sample dataframes shown in the plot
+        
+        self.stacked = False #blank and sample data are stacked (see "stack_data")
+        self.counts_cache = {} #"counts_region" results of the current data by bound indices
+        
         #show the frame
         self.grid(column=1, row=0, rowspan=2, ipadx=1, ipady=1, padx=5, 
                   pady=5, sticky=tk.NSEW)
@@ -643,6 +867,7 @@ class AnalyzeDataFrame(ttk.LabelFrame):
         #show empty graph
         self.fig = Figure(figsize=(6,4), dpi=100, tight_layout=True)
         self.canvas = FigureCanvasTkAgg(self.fig, master=self)
+        self.canvas.get_default_filename = self.default_filename
       
         self.plot_analysis = self.fig.add_subplot(111)
      
@@ -664,64 +889,121 @@ class AnalyzeDataFrame(ttk.LabelFrame):
         top.title("Instructions") 
         tk.Label(top, text=text_instructions, wraplength=300, anchor="e", justify="left").pack()
         
+    def default_filename(self):
+        #file name suggested by the toolbar's save button: the sample file as .png,
+        #or matplotlib's default name before a sample is loaded
+        sample_file_dir = getattr(self, "sample_file_dir", None)
+        if not sample_file_dir:
+            return FigureCanvasTkAgg.get_default_filename(self.canvas)
+        return sample_file_dir[0:-4] + '.png'
+        
     def import_blank(self):
         #select blank file for analysis
         self.blank_file_dir= fd.askopenfilename(title="Select blank file", filetypes = (("Text files", "*.csv"),("All files","*.*")))
-        self.df_blank = pd.read_csv(self.blank_file_dir, skiprows=3)
-        self.df_blank_power = pd.read_csv(self.blank_file_dir,
-                                                        skiprows=lambda x:x not in [0,1])
+        self.df_blank, self.df_blank_power = read_data_file(self.blank_file_dir)
+        self.prepare_arrays("blank")
         self.blank_name = os.path.basename(self.blank_file_dir)
         self.label_blank.config(text=self.blank_name)
 
     def import_sample(self):
     #select sample file for analysis
        self.sample_file_dir= fd.askopenfilename(title="Select sample file", filetypes = (("Text files", "*.csv"),("All files","*.*")))
-       self.df_sample = pd.read_csv(self.sample_file_dir, skiprows=3)
-       self.df_sample_power = pd.read_csv(self.sample_file_dir,
-                                                        skiprows=lambda x:x not in [0,1])
+       self.df_sample, self.df_sample_power = read_data_file(self.sample_file_dir)
+       self.prepare_arrays("sample")
        self.sample_name = os.path.basename(self.sample_file_dir)
        self.label_sample.config(text=self.sample_name)
        
-    def counts_region(self, df, df_power, lbound_low, lbound_high, fbound_low, fbound_high):
+    def prepare_arrays(self, prefix):
+        """Arrays used for the analysis, made once when blank/sample data is loaded
+        
+        Sets (for prefix "blank" or "sample", e.g. self.blank_wl):
+        *_wl: wavelengths
+        *_rep_cols: names of the measurement columns (all except "wavelength")
+        *_counts: (wavelength, measurement) array of counts/nm (float64, same as
+                  the weights, so the integration needs no conversion)
+        *_power: power of each measurement
+        """
+        df = getattr(self, f"df_{prefix}")
+        df_power = getattr(self, f"df_{prefix}_power")
+        wavelength = df["wavelength"].to_numpy()
+        rep_cols = [c for c in df.columns if c != "wavelength"]
+        setattr(self, f"{prefix}_wl", wavelength)
+        setattr(self, f"{prefix}_rep_cols", rep_cols)
+        setattr(self, f"{prefix}_counts", df[rep_cols].to_numpy(dtype=np.float64))
+        setattr(self, f"{prefix}_power", df_power.loc[0].to_numpy(dtype=np.float64))
+        
+        #stacked data and cached "counts_region" results are for the old data
+        self.stacked = False
+        self.counts_cache = {}
+        
+    def stack_data(self):
+        """Stack blank and sample data (measurements side by side), so that both
+        are integrated at once by "counts_region"
+        
+        Blank and sample must have the same wavelengths, so the trapezoid weights
+        (see "trapezoid_weights") and uniform spacing (see "uniform_spacing") are
+        made once for both.
+        """
+        if (self.blank_wl.shape != self.sample_wl.shape
+            or not np.allclose(self.blank_wl, self.sample_wl, rtol=0, atol=1e-6)):
+            raise ValueError("Blank and sample have different wavelengths "
+                             "(measured with different spectrometers?)")
+        self.both_counts = np.concatenate([self.blank_counts, self.sample_counts], axis=1)
+        self.both_power = np.concatenate([self.blank_power, self.sample_power])
+        self.both_cols = self.blank_rep_cols + self.sample_rep_cols
+        self.weights = trapezoid_weights(self.blank_wl)
+        self.dx = uniform_spacing(self.blank_wl)
+        self.stacked = True
+       
+    def bound_indices(self):
+        """Indices of the excitation and PL bounds in the wavelength array
+        
+        Since the wavelength is sorted, the points within lbound_low < wavelength
+        < lbound_high are the slice [i_laser_low:i_laser_high] (same for the PL
+        bounds). The indices are saved and only searched for again if the 
+        bounds or the blank data change.
+        
+        Returns: (i_laser_low, i_laser_high, i_pl_low, i_pl_high)
+        """
+        key = (self.bounds, self.blank_wl)
+        if (self.bound_index_key is None or self.bound_index_key[0] != key[0]
+            or self.bound_index_key[1] is not key[1]):
+            lbound_low, lbound_high, fbound_low, fbound_high = self.bounds
+            wavelength = self.blank_wl
+            i_laser_low, i_pl_low = np.searchsorted(wavelength, [lbound_low, fbound_low],
+                                                    side="right")
+            i_laser_high, i_pl_high = np.searchsorted(wavelength, [lbound_high, fbound_high],
+                                                      side="left")
+            self.bound_index = (i_laser_low, i_laser_high, i_pl_low, i_pl_high)
+            self.bound_index_key = key
+        return self.bound_index
+       
+    def counts_region(self, columns, counts, weights, dx, power, bound_index):
         """Add up (integrate) counts for the laser bounds (lbound) and for the 
         fluorescent bounds (fbound) based on the wavelength bounds that are
         provided.
         
-        First, get wavelength range for bounds. Then, for each point in that range,
-        multiply the intensity/nm of that point with the spacing of each data point (gradient).
-        This converts intensity/nm to intensity. Then, sum up the intensity values. 
+        First, get wavelength range for bounds (bound_index from "bound_indices").
+        Then, for each point in that range,
+        multiply the intensity/nm of that point with its trapezoid weight (~spacing of each
+        data point) and sum up, as a single dot product. This converts intensity/nm to intensity. 
         Finally, normalize (by dividing) the intensity to the power measured by the Si detector (df_power).
         
-        df: dataframe with spectrum intensities
-        df_power: dataframe with intensities from silicon detector/multimeter
+        columns: measurement names (one for each column of counts)
+        counts, weights, dx, power: data (see "stack_data")
+        bound_index: indices of bounds, (i_laser_low, i_laser_high, i_pl_low, i_pl_high)
         
         Returns: df_counts which has counts from laser and fluoresent regions
         """
-        laser_power_array = df_power.loc[0].array #convert dataframe into array
-        
-        laser_signal_boolean = (lbound_low < df["wavelength"]) & (df["wavelength"]< lbound_high)
-        laser_signal = df[laser_signal_boolean]
-        
-        laser_signal_delta_x = np.gradient(laser_signal["wavelength"]) #get wavelength spacing
-        laser_signal = laser_signal.mul(laser_signal_delta_x, axis=0) #multiply counts by wavelength spacing
-        
-        laser_signal_sum = laser_signal.sum() #sum all the counts
-        laser_signal_sum = laser_signal_sum.drop("wavelength")
-        laser_signal_norm = laser_signal_sum/laser_power_array #normalize by power
-        
-           
-        fluor_signal_boolean = (fbound_low < df["wavelength"]) & (df["wavelength"]< fbound_high)
-        fluor_signal = df[fluor_signal_boolean]
-        
-        fluor_signal_delta_x = np.gradient(fluor_signal["wavelength"]) #get wavelength spacing
-        fluor_signal = fluor_signal.mul(fluor_signal_delta_x, axis=0) #multiply counts by wavelength spacing
-        
-        fluor_signal_sum = fluor_signal.sum()
-        fluor_signal_sum = fluor_signal_sum.drop("wavelength")
-        fluor_signal_norm = fluor_signal_sum/laser_power_array
-            
-        df_counts = pd.concat([laser_signal_norm, fluor_signal_norm], axis=1)
-        df_counts.columns = ["excit_total_counts", "fluor_total_counts"]
+        i_laser_low, i_laser_high, i_pl_low, i_pl_high = bound_index
+        
+        #multiply counts by weights, sum and normalize by power
+        laser_signal_norm = integrate_region(counts, weights, i_laser_low, i_laser_high,
+                                             power, dx)
+        fluor_signal_norm = integrate_region(counts, weights, i_pl_low, i_pl_high,
+                                             power, dx)
+        df_counts = pd.DataFrame({"excit_total_counts": laser_signal_norm,
+                                  "fluor_total_counts": fluor_signal_norm}, index=columns)
     
         return df_counts
     
@@ -735,26 +1017,52 @@ class AnalyzeDataFrame(ttk.LabelFrame):
         fbound_high = int(self.entry_pl_high.get())
         
         self.bounds = (lbound_low, lbound_high, fbound_low, fbound_high)
-        
-        self.df_blank_analysis = self.counts_region(self.df_blank, self.df_blank_power,
-                                                    lbound_low, 
-                                                    lbound_high, fbound_low,
-                                                    fbound_high)
-        self.df_sample_analysis = self.counts_region(self.df_sample, self.df_sample_power,
-                                                     lbound_low, 
-                                                    lbound_high, fbound_low,
-                                                    fbound_high)
+        bound_index = self.bound_indices() #blank and sample have same wavelengths
+        
+        # integrate blank and sample at once, then split them. Results are
+        # cached by bounds until new data is loaded (see "prepare_arrays")
+        if not self.stacked:
+            self.stack_data()
+        if bound_index not in self.counts_cache:
+            df_counts = self.counts_region(self.both_cols, self.both_counts, self.weights,
+                                           self.dx, self.both_power, bound_index)
+            n_blank = self.blank_counts.shape[1]
+            self.counts_cache[bound_index] = (df_counts.iloc[:n_blank], df_counts.iloc[n_blank:])
+        self.df_blank_analysis, self.df_sample_analysis = self.counts_cache[bound_index]
+            
+        # counts of the averaged spectra, looked up once and reused for the std
+        self.blank_mean_counts = self.mean_counts(self.df_blank_analysis)
+        self.sample_mean_counts = self.mean_counts(self.df_sample_analysis)
+        blank_laser, blank_fluor = self.blank_mean_counts
+        sample_laser, sample_fluor = self.sample_mean_counts
             
-        self.photons_emitted_mean = self.df_sample_analysis["fluor_total_counts"]["mean_photon_counts"] -\
-                                    self.df_blank_analysis["fluor_total_counts"]["mean_photon_counts"]
-        self.photons_abs_mean = self.df_blank_analysis["excit_total_counts"]["mean_photon_counts"] -\
-                                self.df_sample_analysis["excit_total_counts"]["mean_photon_counts"]
+        self.photons_emitted_mean = sample_fluor - blank_fluor
+        self.photons_abs_mean = blank_laser - sample_laser
         self.plqy_mean = self.photons_emitted_mean/self.photons_abs_mean
         
         self.calculate_plqy_std() #call function to calculate standard deviation
         
         self.update_plot()
         
+    def mean_counts(self, df_analysis):
+        """Excitation and PL counts of the averaged spectrum ("mean_photon_counts" row
+        of the "counts_region" result)
+        
+        Returns: (excitation counts, PL counts) as numpy scalars
+        """
+        return (df_analysis.at["mean_photon_counts", "excit_total_counts"],
+                df_analysis.at["mean_photon_counts", "fluor_total_counts"])
+        
+    def replicate_std(self, df_analysis):
+        """Standard deviation (ddof=1, as in pandas) of the excitation and PL
+        counts of the individual measurements, i.e. all rows of the "counts_region"
+        result except "mean_photon_counts"
+        
+        Returns: array of (excitation std, PL std)
+        """
+        replicates = df_analysis.to_numpy()[df_analysis.index != "mean_photon_counts"]
+        return replicates.std(axis=0, ddof=1)
+        
     def calculate_plqy_std(self):
         """Error bars for PLQY calculation. 
         
@@ -762,16 +1070,12 @@ class AnalyzeDataFrame(ttk.LabelFrame):
         about 5%
         """
         #   Averages
-        blank_laser_average = self.df_blank_analysis["excit_total_counts"]["mean_photon_counts"]
-        blank_fluor_average = self.df_blank_analysis["fluor_total_counts"]["mean_photon_counts"]
-        sample_laser_average = self.df_sample_analysis["excit_total_counts"]["mean_photon_counts"]
-        sample_fluor_average = self.df_sample_analysis["fluor_total_counts"]["mean_photon_counts"]   
+        blank_laser_average, blank_fluor_average = self.blank_mean_counts
+        sample_laser_average, sample_fluor_average = self.sample_mean_counts
         
-        # std deviations
-        blank_laser_std = self.df_blank_analysis["excit_total_counts"].drop("mean_photon_counts").std()
-        blank_fluor_std = self.df_blank_analysis["fluor_total_counts"].drop("mean_photon_counts").std()
-        sample_laser_std = self.df_sample_analysis["excit_total_counts"].drop("mean_photon_counts").std()
-        sample_fluor_std = self.df_sample_analysis["fluor_total_counts"].drop("mean_photon_counts").std()
+        # std deviations of the individual measurements (excitation and PL at once)
+        blank_laser_std, blank_fluor_std = self.replicate_std(self.df_blank_analysis)
+        sample_laser_std, sample_fluor_std = self.replicate_std(self.df_sample_analysis)
         
         #variances
         blank_laser_var = blank_laser_std**2
@@ -789,76 +1093,95 @@ class AnalyzeDataFrame(ttk.LabelFrame):
         self.plqy_std = qy_average*((qy_std_a + qy_std_b)**(1/2))
 
       
-    def update_plot(self):
-        #update plot after PLQY calculation
-        self.fig.clf()
-        self.fig = Figure(figsize=(6,4), dpi=100, tight_layout=True)
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self)
-        self.canvas.get_default_filename = lambda: (
-            self.sample_file_dir[0:-4] + '.png') 
-        self.plot_analysis = self.fig.add_subplot(111)
+    def build_plot(self):
+        #make the lines, insets and text of the analysis plot. Only done once,
+        #afterwards "update_plot" only updates their data
+        ax = self.plot_analysis
+        #one blank and one sample line on the main plot and on each inset, all
+        #showing the same data
+        self.lines_blank = ax.plot([], [], color="black")
+        self.lines_sample = ax.plot([], [], color="red")
+        ax.set_xlabel("Wavelength (nm)")
+        ax.set_ylabel("Intensity (counts)")
+        ax.set_xlim (348, 738)
         
-        #update toolbar
-        self.toolbar_frame = tk.Frame(master=self)
-        self.toolbar_frame.grid(column=2, row=5, columnspan=4,
-                                sticky=tk.E)
-        self.toolbar = NavigationToolbar2Tk(self.canvas, self.toolbar_frame).update()
+        self.axins2 = inset_axes(ax, width="100%", height="100%", loc='upper left',
+                bbox_to_anchor=(0.25,0.55,0.3,0.4), bbox_transform=ax.transAxes)
+        self.lines_blank += self.axins2.plot([], [], color="black")
+        self.lines_sample += self.axins2.plot([], [], color="red")
+        self.axins2.tick_params(axis='both', which='major', labelsize=8)
         
-        lbound_low = int(self.entry_laser_low.get())
-        lbound_high = int(self.entry_laser_high.get())
-        fbound_low = int(self.entry_pl_low.get())
-        fbound_high = int(self.entry_pl_high.get())
+        self.axins3 = inset_axes(ax, width="100%", height="100%", loc='upper left',
+                bbox_to_anchor=(0.65,0.55,0.3,0.4), bbox_transform=ax.transAxes)
+        self.lines_blank += self.axins3.plot([], [], color="black")
+        self.lines_sample += self.axins3.plot([], [], color="red")
+        self.axins3.tick_params(axis='both', which='major', labelsize=8)
+        
+        #text for PLQY
+        self.plqy_text = ax.text(0.3, 0.20, "", transform=ax.transAxes,
+                                 bbox=dict(boxstyle="round",facecolor='white', alpha=0.1))
+        self.plot_built = True
+      
+    def update_plot(self):
+        #update plot after PLQY calculation (the figure, canvas, toolbar, axes
+        #and lines are reused, see "build_plot")
+        if not self.plot_built:
+            self.build_plot()
+        self.canvas.toolbar.update() #clear zoom/pan history
+        
+        lbound_low, lbound_high, fbound_low, fbound_high = self.bounds #from "calculate_plqy"
+        
+        blank_counts = self.df_blank["mean_photon_counts"].to_numpy()
+        sample_counts = self.df_sample["mean_photon_counts"].to_numpy()
+        
+        #the lines only get new data when the blank or sample has changed, not
+        #when only the bounds have
+        plotted_blank, plotted_sample = self.plotted_data
+        data_changed = plotted_blank is not self.df_blank or plotted_sample is not self.df_sample
+        if data_changed:
+            for line in self.lines_blank:
+                line.set_data(self.blank_wl, blank_counts)
+            for line in self.lines_sample:
+                line.set_data(self.sample_wl, sample_counts)
+            self.plotted_data = (self.df_blank, self.df_sample)
     
         ax = self.plot_analysis
-        ax.clear()
-        ax.plot(self.df_blank["wavelength"], self.df_blank["mean_photon_counts"], color="black")
-        ax.plot(self.df_sample["wavelength"], self.df_sample["mean_photon_counts"], color="red")
-
         ax.set_title("\n".join(wrap(self.sample_name,60)), fontsize="10")
-        ax.set_xlabel("Wavelength (nm)")
-        ax.set_ylabel("Intensity (counts)")
         ax.set_xlim (348, 738)
         
-        axins2 = inset_axes(ax, width="100%", height="100%", loc='upper left',
-                bbox_to_anchor=(0.25,0.55,0.3,0.4), bbox_transform=ax.transAxes)
-        axins2.plot(self.df_blank["wavelength"], self.df_blank["mean_photon_counts"], color="black")
-        axins2.plot(self.df_sample["wavelength"], self.df_sample["mean_photon_counts"], color="red")
+        axins2 = self.axins2
         axins2.set_xlim(lbound_low,lbound_high)
         axins2.set_title(str(lbound_low)+" < Excit. (nm) < "+str(lbound_high), fontsize=8, pad=3)
-        axins2.tick_params(axis='both', which='major', labelsize=8)
         
-        axins3 = inset_axes(ax, width="100%", height="100%", loc='upper left',
-                bbox_to_anchor=(0.65,0.55,0.3,0.4), bbox_transform=ax.transAxes)
-        axins3.plot(self.df_blank["wavelength"], self.df_blank["mean_photon_counts"], color="black")
-        axins3.plot(self.df_sample["wavelength"], self.df_sample["mean_photon_counts"], color="red")
+        #y axis of main plot and excitation inset scale to the full data
+        for axes in (ax, axins2):
+            axes.set_autoscaley_on(True)
+            if data_changed:
+                axes.relim()
+            axes.autoscale_view(scalex=False)
+        
+        axins3 = self.axins3
         axins3.set_xlim(fbound_low,fbound_high)
         axins3.set_title(str(fbound_low)+" < PL (nm) < "+str(fbound_high), fontsize=8, pad=3)
-        axins3.tick_params(axis='both', which='major', labelsize=8)
         
-        #plot and scale dyamically
-        index_low = np.abs(self.df_sample["wavelength"] - fbound_low).argmin()
-        index_high = np.abs(self.df_sample["wavelength"] - fbound_high).argmin()
+        #plot and scale dyamically (PL bound indices found by "bound_indices")
+        _, _, index_low, index_high = self.bound_indices()
         
-        ymin_PL = min(self.df_blank["mean_photon_counts"][index_low:index_high])
-        ymax_PL = max(self.df_sample["mean_photon_counts"][index_low:index_high])
+        ymin_PL = blank_counts[index_low:index_high].min()
+        ymax_PL = sample_counts[index_low:index_high].max()
         axins3.set_ylim(ymin_PL, ymax_PL)
         
         
         #text for PLQY
-        ax.text(0.3, 0.20, r"Quantum Yield ($\pm \sigma$): " + str(round(self.plqy_mean*100,1)) +
+        self.plqy_text.set_text(r"Quantum Yield ($\pm \sigma$): " + str(round(self.plqy_mean*100,1)) +
                 r" $\pm$ " + str(round(self.plqy_std*100,1)) + "%" + 
                 "\n\n" +
                 "Photons absorbed (a.u.): " + str(int(round(self.photons_abs_mean))) +
                 "\n" +
-                "Photons emitted (a.u.): " + str(int(round(self.photons_emitted_mean))) 
-          , transform=ax.transAxes
-          ,bbox=dict(boxstyle="round",facecolor='white', alpha=0.1))
+                "Photons emitted (a.u.): " + str(int(round(self.photons_emitted_mean))))
         
         
-        self.canvas.draw()
-        self.canvas.get_tk_widget().grid(column=0, row=4,
-                                          columnspan=5, padx=5, 
-                                          pady=5) #side=tk.TOP)
+        self.canvas.draw_idle()
 
     def save_analysis(self):
         #save analysis when button pressed 
@@ -868,30 +1191,26 @@ class AnalyzeDataFrame(ttk.LabelFrame):
         name_dir = directory + "/" + save_filename
         os.makedirs(directory, exist_ok=True)
         
-        #save analysis file
-        with open(name_dir, 'a', newline="") as f:
-            f.write("Bounds: \n")
-            f.write("Excit_lower_bound, Excit_upper_bound, PL_lower_bound, PL_upper_bound \n " 
-                    + str(self.bounds)[1:-1])
-            f.write("\n\n")
-            
-            f.write("Sample: ")
-            f.write(self.sample_name[:-4] + "\n")
-            self.df_sample_analysis.to_csv(f)
-            f.write("\n")
-            
-            f.write("Blank: ")
-            f.write(self.blank_name[:-4] + "\n")
-            self.df_blank_analysis.to_csv(f)
-            f.write("\n")
-            
-            f.write("Photons_emitted_mean: ," + str(self.photons_emitted_mean) + '\n')
-            f.write("Photons_absorbed_mean: ," + str(self.photons_abs_mean) + '\n')
-            f.write("PLQY: ," + str(self.plqy_mean) + '\n')
+        #save analysis file, assembled in memory and written at once
+        parts = ["Bounds: \n",
+                 "Excit_lower_bound, Excit_upper_bound, PL_lower_bound, PL_upper_bound \n " 
+                 + str(self.bounds)[1:-1],
+                 "\n\n",
+                 "Sample: " + self.sample_name[:-4] + "\n",
+                 self.df_sample_analysis.to_csv(),
+                 "\n",
+                 "Blank: " + self.blank_name[:-4] + "\n",
+                 self.df_blank_analysis.to_csv(),
+                 "\n",
+                 "Photons_emitted_mean: ," + str(self.photons_emitted_mean) + '\n',
+                 "Photons_absorbed_mean: ," + str(self.photons_abs_mean) + '\n',
+                 "PLQY: ," + str(self.plqy_mean) + '\n']
+        with open(name_dir, 'w', newline="") as f:
+            f.write("".join(parts))
         
         #save figure
         self.fig.savefig(name_dir[:-4] + ".png")
-        initialize_frame.label_collection_progress.config(text="Analysis files saved.")
+        initialize_frame.set_progress("Analysis files saved.")
             
             
 class App(tk.Tk): 